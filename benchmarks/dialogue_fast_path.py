@@ -0,0 +1,83 @@
+"""
+Replay recorded conversations through `DialogueEngine` and report how many turns are served locally.
+
+LLM turns are answered with the recorded assistant reply, so no API calls are made. Latency saved is the
+recorded LLM latency of every turn the engine answered from a template, minus the time the engine spent.
+
+Usage:
+    python benchmarks/dialogue_fast_path.py [benchmarks/recorded_conversations.json]
+"""
+import datetime
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from haystack import Document  # noqa: E402
+from haystack.dataclasses import ChatMessage  # noqa: E402
+
+from dialogue_engine import DialogueEngine  # noqa: E402
+from shared_state import InMemoryStateBackend  # noqa: E402
+
+TODAY = datetime.date.today()
+EVENTS = [
+    Document(id="66d1f0a1", content="{}", meta={
+        "name": "Miniature Paintings of India", "startDate": f"{TODAY + datetime.timedelta(days=2)}T10:00:00+00:00",
+        "ticketPrice": 100.0, "availableSeats": 40}),
+    Document(id="66d1f0a2", content="{}", meta={
+        "name": "Indus Valley Treasures", "startDate": f"{TODAY + datetime.timedelta(days=4)}T14:00:00+00:00",
+        "ticketPrice": 250.0, "availableSeats": 12}),
+]
+
+
+class RecordedRAGService:
+    """
+    Stand-in for `RAGService` that answers with the next recorded assistant reply.
+    """
+
+    def __init__(self):
+        self.shared_state = InMemoryStateBackend()
+        self.reply = None
+
+    def view_documents(self, filters=None):
+        # Every recorded event is inside the booking window and has seats left
+        return EVENTS
+
+    def query(self, question, message_list):
+        message_list = [ChatMessage.from_dict(message) for message in message_list]
+        return [*message_list, ChatMessage.from_user(content=question),
+                ChatMessage.from_assistant(content=json.dumps({"response": self.reply, "suggested": []}))]
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "recorded_conversations.json")
+    with open(path) as f:
+        conversations = json.load(f)
+
+    rag_service = RecordedRAGService()
+    engine = DialogueEngine(rag_service)
+    llm_ms_avoided = 0.0
+    for conversation in conversations:
+        message_list = [ChatMessage.from_assistant(
+            content=json.dumps({"response": conversation["greeting"], "suggested": []}))]
+        state = engine.new_state(message_list)
+        for turn in conversation["turns"]:
+            rag_service.reply = turn["assistant"]
+            local_turns = engine.metrics()["local_turns"]
+            message_list, state = engine.respond(turn["user"], [message.to_dict() for message in message_list],
+                                                 state)
+            if engine.metrics()["local_turns"] > local_turns:
+                llm_ms_avoided += turn["llm_latency_ms"]
+
+    stats = engine.metrics()
+    turns = stats["local_turns"] + stats["llm_turns"]
+    print(f"conversations:        {len(conversations)}")
+    print(f"turns:                {turns}")
+    print(f"served locally:       {stats['local_turns']} ({stats['local_share']:.0%})")
+    print(f"local time per turn:  {stats['local_seconds'] * 1000 / max(stats['local_turns'], 1):.3f} ms")
+    print(f"LLM latency saved:    {(llm_ms_avoided - stats['local_seconds'] * 1000) / 1000:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
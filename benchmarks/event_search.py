@@ -0,0 +1,148 @@
+"""
+Compare event retrieval strategies on a synthetic event calendar.
+
+- vector: embedding similarity only, no metadata filters
+- hybrid: date/category/seat pre-filters, then BM25 and embedding similarity fused by reciprocal rank
+- stuff-everything: every event rendered into the prompt, as `RAGService.new_chat` does
+
+Events are converted with `MongoDBClient.mongo_event_doc_to_haystack_doc` and filtered with
+`RAGService.event_filters`; an in-memory document store stands in for Weaviate. Embeddings come from
+Gemini, so `GOOGLE_API_KEY` must be set.
+
+Usage:
+    python benchmarks/event_search.py [--events 300] [--top-k 5]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+from haystack import Pipeline  # noqa: E402
+from haystack.components.builders import PromptBuilder  # noqa: E402
+from haystack.components.joiners import DocumentJoiner  # noqa: E402
+from haystack.components.retrievers.in_memory import InMemoryBM25Retriever, InMemoryEmbeddingRetriever  # noqa: E402
+from haystack.document_stores.in_memory import InMemoryDocumentStore  # noqa: E402
+
+from embedders.gemini_document_embedder import GeminiDocumentEmbedder  # noqa: E402
+from embedders.gemini_text_embedder import GeminiTextEmbedder  # noqa: E402
+from mongo_client import MongoDBClient  # noqa: E402
+from rag_service import RAGService  # noqa: E402
+
+CATEGORIES = {
+    "Art": ["miniature paintings", "modern art", "sculpture", "textile art"],
+    "History": ["Indus Valley", "Maratha empire", "colonial Bombay", "ancient coins"],
+    "Science": ["natural history", "fossils", "astronomy", "ship models"],
+    "Performance": ["classical dance", "puppet theatre", "music recital", "storytelling"],
+}
+TODAY = datetime.datetime(2026, 10, 19)
+# (query, category, start offset in days, end offset in days, topic keyword)
+QUERIES = [
+    ("art exhibitions next weekend with seats left", "Art", 5, 7, None),
+    ("fossils exhibit this month", "Science", 0, 30, "fossils"),
+    ("classical dance performance in November with seats available", "Performance", 13, 42, "classical dance"),
+    ("Indus Valley history talk next week", "History", 7, 14, "Indus Valley"),
+    ("sculpture shows in the next two weeks", "Art", 0, 14, "sculpture"),
+    ("puppet theatre for kids this weekend", "Performance", 5, 7, "puppet theatre"),
+]
+
+
+def make_events(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        category = rng.choice(list(CATEGORIES))
+        topic = rng.choice(CATEGORIES[category])
+        start = TODAY + datetime.timedelta(days=rng.randint(-20, 60), hours=rng.choice([10, 14, 18]))
+        events.append({
+            "_id": ObjectId(),
+            "name": f"{topic.title()} {rng.choice(['Showcase', 'Gallery', 'Festival', 'Evening', 'Workshop'])} {i}",
+            "description": f"A {category.lower()} event about {topic} at the museum.",
+            "category": category,
+            "startDate": start,
+            "endDate": start + datetime.timedelta(days=rng.choice([0, 1, 2, 6])),
+            "availableSeats": rng.choice([0, 0, 3, 12, 40, 120]),
+            "ticketPrice": rng.choice([0, 100, 250, 500]),
+        })
+    return events
+
+
+def relevant_ids(events: list[dict], category: str, start: datetime.date, end: datetime.date,
+                 topic: str | None) -> set[str]:
+    return {
+        str(event["_id"]) for event in events
+        if event["category"] == category and event["endDate"].date() >= start and event["startDate"].date() <= end
+        and event["availableSeats"] > 0 and (topic is None or topic.lower() in event["description"].lower())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    documents = [MongoDBClient.mongo_event_doc_to_haystack_doc(dict(event)) for event in events]
+    documents = GeminiDocumentEmbedder(progress_bar=False).run(documents=documents)["documents"]
+    document_store = InMemoryDocumentStore(embedding_similarity_function="cosine")
+    document_store.write_documents(documents)
+
+    query_embedder = GeminiTextEmbedder(progress_bar=False)
+    embedding_retriever = InMemoryEmbeddingRetriever(document_store=document_store)
+    hybrid = Pipeline()
+    hybrid.add_component("embedding_retriever", InMemoryEmbeddingRetriever(document_store=document_store))
+    hybrid.add_component("bm25_retriever", InMemoryBM25Retriever(document_store=document_store))
+    hybrid.add_component("document_joiner", DocumentJoiner(join_mode="reciprocal_rank_fusion"))
+    hybrid.connect("embedding_retriever", "document_joiner")
+    hybrid.connect("bm25_retriever", "document_joiner")
+    stuff_prompt = PromptBuilder(template="{% for doc in documents %} {{ doc.meta }} ID: {{ doc.id }} "
+                                          "Content: {{ doc.content }}\n{% endfor %}")
+
+    results = {"vector": ([], []), "hybrid": ([], []), "stuff-everything": ([], [])}
+    prompt_chars = 0
+    for query, category, start_offset, end_offset, topic in QUERIES:
+        start = (TODAY + datetime.timedelta(days=start_offset)).date()
+        end = (TODAY + datetime.timedelta(days=end_offset)).date()
+        relevant = relevant_ids(events, category, start, end, topic)
+        if not relevant:
+            continue
+        # Embedding the query is shared by both retrieval strategies and excluded from their latency
+        query_embedding = query_embedder.run(text=query)["embedding"]
+        expected = min(len(relevant), args.top_k)
+
+        began = time.perf_counter()
+        found = embedding_retriever.run(query_embedding=query_embedding, top_k=args.top_k)["documents"]
+        results["vector"][1].append(time.perf_counter() - began)
+        results["vector"][0].append(len({doc.id for doc in found} & relevant) / expected)
+
+        filters = RAGService.event_filters(start_date=start, end_date=end, category=category, min_available_seats=1)
+        began = time.perf_counter()
+        found = hybrid.run({
+            "embedding_retriever": {"query_embedding": query_embedding, "filters": filters, "top_k": args.top_k * 2},
+            "bm25_retriever": {"query": query, "filters": filters, "top_k": args.top_k * 2},
+            "document_joiner": {"top_k": args.top_k},
+        })["document_joiner"]["documents"]
+        results["hybrid"][1].append(time.perf_counter() - began)
+        results["hybrid"][0].append(len({doc.id for doc in found} & relevant) / expected)
+
+        began = time.perf_counter()
+        prompt = stuff_prompt.run(documents=documents)["prompt"]
+        results["stuff-everything"][1].append(time.perf_counter() - began)
+        results["stuff-everything"][0].append(1.0)
+        prompt_chars = len(prompt)
+
+    print(f"{len(events)} events, {len(results['vector'][0])} queries, recall@{args.top_k}")
+    print(f"{'strategy':>18} {'recall':>8} {'p50 ms':>8}")
+    for strategy, (recalls, latencies) in results.items():
+        print(f"{strategy:>18} {statistics.mean(recalls):>8.2f} {statistics.median(latencies) * 1000:>8.2f}")
+    print(f"stuff-everything prompt: ~{prompt_chars // 4} tokens per turn (recall is trivially 1; cost is context)")
+
+
+if __name__ == "__main__":
+    main()
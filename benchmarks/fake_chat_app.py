@@ -0,0 +1,70 @@
+"""
+Stand-in for `main:app` whose `/chat` runs the same per-turn work as `RAGService.query` with a fake generator:
+rebuilding the chat history from JSON, rendering the prompt, converting it to a chat message, validating the
+reply against the output schema and serializing the full message list back to the client.
+Like the real handler it is a plain `def`, so turns run in FastAPI's threadpool in both apps.
+
+Used by `worker_scaling.py` where Weaviate, Mongo and Gemini are not available.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+from haystack import Pipeline, component  # noqa: E402
+from haystack.components.builders import PromptBuilder  # noqa: E402
+from haystack.components.joiners import BranchJoiner  # noqa: E402
+from haystack.components.validators import JsonSchemaValidator  # noqa: E402
+from haystack.dataclasses import ChatMessage  # noqa: E402
+
+from converters.prompt_to_chatmessage_converter import PromptToChatMessage  # noqa: E402
+
+OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {"response": {"type": "string"}, "suggested": {"type": "array", "items": {"type": "string"}}},
+}
+REPLY = json.dumps({"response": "How many tickets would you like to book under each category?",
+                    "suggested": ["1 adult", "2 adults and 1 child", "General admission only"]})
+
+
+@component
+class FakeChatGenerator:
+    @component.output_types(replies=list[ChatMessage])
+    def run(self, messages: list[ChatMessage]):
+        return {"replies": [ChatMessage.from_assistant(content=REPLY)]}
+
+
+pipeline = Pipeline()
+pipeline.add_component("prompt", PromptBuilder(template="{{ query }}"))
+pipeline.add_component("prompt_to_chat_message_converter", PromptToChatMessage(prompt="{{ query }}"))
+pipeline.add_component("branch_joiner", BranchJoiner(list[ChatMessage]))
+pipeline.add_component("generator", FakeChatGenerator())
+pipeline.add_component("schema_validator", JsonSchemaValidator())
+pipeline.connect("prompt.prompt", "prompt_to_chat_message_converter")
+pipeline.connect("prompt_to_chat_message_converter.message_list", "branch_joiner")
+pipeline.connect("branch_joiner", "generator")
+pipeline.connect("generator.replies", "schema_validator.messages")
+pipeline.connect("schema_validator.validation_error", "branch_joiner")
+
+app = FastAPI()
+
+
+@app.get("/")
+def root():
+    return {"message": "Hello, World!"}
+
+
+@app.post("/chat")
+def chat(conversation: dict):
+    message_list = [ChatMessage.from_dict(message) for message in conversation["message_list"]]
+    result = pipeline.run({
+        "prompt": {"query": conversation["query"]},
+        "prompt_to_chat_message_converter": {"message_list": message_list, "role": "user"},
+        "schema_validator": {"json_schema": OUTPUT_SCHEMA},
+    }, include_outputs_from={"prompt_to_chat_message_converter"})
+    message_list = result["prompt_to_chat_message_converter"]["message_list"]
+    message_list.append(result["schema_validator"]["validated"][0])
+    json.loads(message_list[-1].content)
+    return {"message_list": [message.to_dict() for message in message_list]}
@@ -0,0 +1,106 @@
+"""
+Replay recorded conversations through `RoutedChatGenerator` with local fake generators and compare
+per-turn routing against sending every turn to the standard model.
+
+Each fake generator sleeps for its model's typical latency (scaled by `--time-scale`) and returns the recorded
+assistant reply, producing a malformed reply at the route's schema failure rate. Replies go through
+`JsonSchemaValidator` like in `RAGService`, so schema failures are retried on the strong route.
+
+The latencies and failure rates in `FAKE_MODELS` are assumptions, not measurements: the output shows how routing
+shifts calls between routes, and the model time follows from those assumed figures. The behaviour itself is covered
+by `tests/test_routed_chat_generator.py`.
+
+Usage:
+    python benchmarks/model_routing.py [--time-scale 0.01]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from haystack.components.validators import JsonSchemaValidator  # noqa: E402
+from haystack.dataclasses import ChatMessage  # noqa: E402
+
+from generators.routed_chat_generator import RoutedChatGenerator, classify_turn  # noqa: E402
+from rag_service import DEFAULT_ROUTES  # noqa: E402
+
+# Typical latency in seconds and share of replies that break the schema, per route
+FAKE_MODELS = {"fast": (0.6, 0.08), "standard": (1.9, 0.03), "strong": (5.5, 0.0)}
+OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {"response": {"type": "string"}, "suggested": {"type": "array", "items": {"type": "string"}}},
+    "required": ["response", "suggested"],
+}
+
+
+class FakeGenerator:
+    def __init__(self, latency: float, failure_rate: float, seed: int):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.reply = ""
+
+    def run(self, messages):
+        time.sleep(self.latency)
+        if self.rng.random() < self.failure_rate:
+            return {"replies": [ChatMessage.from_assistant(content=json.dumps({"reply": self.reply}))]}
+        return {"replies": [ChatMessage.from_assistant(content=json.dumps({"response": self.reply, "suggested": []}))]}
+
+
+def replay(conversations: list[dict], classifier, time_scale: float) -> tuple[RoutedChatGenerator, float]:
+    routes = {
+        name: {**DEFAULT_ROUTES[name], "latency_budget": DEFAULT_ROUTES[name]["latency_budget"] * time_scale,
+               "generator": FakeGenerator(latency * time_scale, failure_rate, seed=i)}
+        for i, (name, (latency, failure_rate)) in enumerate(FAKE_MODELS.items())
+    }
+    generator = RoutedChatGenerator(routes=routes, classifier=classifier)
+    validator = JsonSchemaValidator(json_schema=OUTPUT_SCHEMA)
+    start = time.perf_counter()
+    for conversation in conversations:
+        messages = [ChatMessage.from_system(content="You are a museum ticketing bot.")]
+        for turn in conversation["turns"]:
+            messages.append(ChatMessage.from_user(content=turn["user"]))
+            pending = messages
+            for route in routes.values():
+                route["generator"].reply = turn["assistant"]
+            while True:
+                replies = generator.run(messages=pending)["replies"]
+                result = validator.run(messages=replies)
+                if "validated" in result:
+                    messages.append(result["validated"][0])
+                    break
+                pending = result["validation_error"]
+    return generator, time.perf_counter() - start
+
+
+def print_metrics(title: str, generator: RoutedChatGenerator, elapsed: float, time_scale: float):
+    print(f"\n{title}: {elapsed / time_scale:.1f} s of model time")
+    print(f"{'route':>10} {'calls':>6} {'avg s':>7} {'over budget':>12} {'schema fail':>12} {'cost USD':>10}")
+    for name, metrics in generator.metrics().items():
+        print(f"{name:>10} {metrics['calls']:>6} {metrics['avg_latency_seconds'] / time_scale:>7.2f} "
+              f"{metrics['budget_misses']:>12} {metrics['schema_failure_rate']:>12.0%} {metrics['cost_usd']:>10.6f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("conversations", nargs="?",
+                        default=os.path.join(os.path.dirname(__file__), "recorded_conversations.json"))
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with open(args.conversations) as f:
+        conversations = json.load(f)
+
+    generator, elapsed = replay(conversations, classifier=lambda messages: "standard", time_scale=args.time_scale)
+    print_metrics("Single model (standard)", generator, elapsed, args.time_scale)
+    generator, elapsed = replay(conversations, classifier=classify_turn,
+                                time_scale=args.time_scale)
+    print_metrics("Routed per turn", generator, elapsed, args.time_scale)
+
+
+if __name__ == "__main__":
+    main()
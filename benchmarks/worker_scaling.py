@@ -0,0 +1,98 @@
+"""
+Measure `/chat` throughput as the number of uvicorn workers grows.
+
+Starts uvicorn for each requested worker count and replays one chat turn with a realistic history (a long system
+prompt with the event list plus a recorded conversation) from many concurrent clients, then prints requests per
+second. The worker count is passed through `WEB_CONCURRENCY`, so `main:app` goes through the same
+shared-state backend check as a real deployment and needs SHARED_STATE_BACKEND=mongo or redis for N > 1.
+
+By default the stand-in `benchmarks.fake_chat_app:app` is served, which does the per-turn JSON, template and
+validation work of `RAGService.query` with a fake generator and needs no external services.
+
+Usage:
+    python benchmarks/worker_scaling.py --workers 1 2 4
+    SHARED_STATE_BACKEND=redis python benchmarks/worker_scaling.py --app main:app --workers 1 2 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def chat_payload() -> bytes:
+    with open(os.path.join(ROOT, "benchmarks", "recorded_conversations.json")) as f:
+        conversation = json.load(f)[0]
+    events = "\n".join(
+        f"{{'name': 'Event {i}', 'category': 'Art', 'startDate': '2026-11-{i % 28 + 1:02d}T10:00:00+00:00'}} "
+        f"ID: {i:024x} Content: {json.dumps({'name': f'Event {i}', 'description': 'A gallery showcase. ' * 8})}"
+        for i in range(40)
+    )
+    messages = [{"role": "system", "content": "You are a museum ticketing bot. " * 150 + events, "name": None,
+                 "meta": {}}]
+    for turn in conversation["turns"][:-1]:
+        messages.append({"role": "user", "content": turn["user"], "name": None, "meta": {}})
+        messages.append({"role": "assistant", "name": None, "meta": {},
+                         "content": json.dumps({"response": turn["assistant"], "suggested": []})})
+    return json.dumps({"query": conversation["turns"][-1]["user"], "message_list": messages}).encode()
+
+
+def wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except Exception:
+            time.sleep(0.5)
+    raise TimeoutError(f"Server at {url} did not become ready in {timeout} seconds")
+
+
+def fire(url: str, payload: bytes, requests: int, concurrency: int) -> float:
+    def hit(_):
+        request = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request, timeout=60).read()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(hit, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="benchmarks.fake_chat_app:app")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    payload = chat_payload()
+    baseline = None
+    print(f"{args.app}, {os.cpu_count()} CPUs, {len(payload) // 1024} KiB request body")
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", args.app, "--port", str(args.port), "--log-level", "warning"],
+            cwd=ROOT, env={**os.environ, "WEB_CONCURRENCY": str(workers)},
+        )
+        try:
+            wait_until_ready(base_url + "/")
+            fire(base_url + "/chat", payload, min(args.requests, 100), args.concurrency)  # warm up every worker
+            throughput = fire(base_url + "/chat", payload, args.requests, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
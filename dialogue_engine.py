@@ -0,0 +1,383 @@
+import datetime
+import json
+import re
+import time
+from typing import Any, Optional
+
+from haystack.dataclasses import ChatMessage
+
+from rag_service import RAGService
+
+GENERAL_ADMISSION_PRICES = {
+    "local": {"adult": 150, "child": 35, "sr_citizen": 100, "student": 75},
+    "foreign": {"foreigner": 700, "child": 200},
+}
+CATEGORY_LABELS = {
+    "adult": "Adult (16 to 60 years)",
+    "child": "Children / School Student (5 to 15 years)",
+    "sr_citizen": "Sr. Citizen / Defence Personnel (with a valid ID card)",
+    "student": "College Student (with a valid ID card)",
+    "foreigner": "Adult (16 years and above)",
+}
+CATEGORY_WORDS = {
+    "adult": "adult", "adults": "adult",
+    "child": "child", "children": "child", "kid": "child", "kids": "child",
+    "senior": "sr_citizen", "seniors": "sr_citizen", "sr": "sr_citizen", "citizen": "sr_citizen",
+    "citizens": "sr_citizen",
+    "student": "student", "students": "student",
+    "foreigner": "foreigner", "foreigners": "foreigner",
+}
+# Inclusive age range in years for each category, from the price lists in steps 3 and 4 of the system prompt
+CATEGORY_AGES = {
+    "adult": (16, 60),
+    "child": (5, 15),
+    "sr_citizen": (61, 120),
+    "student": (16, 120),
+    "foreigner": (16, 120),
+}
+ADD_ON_PRICES = {"audio_guide": 75, "camera": 200}
+ADD_ON_WORDS = {"yes", "add", "the", "a", "an", "audio", "guide", "handheld", "camera", "both", "and", "please", "only"}
+NUMBER_WORDS = {
+    "no": 0, "zero": 0, "one": 1, "a": 1, "an": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+NEGATION_WORDS = {"not", "no", "never", "nor"}
+YES_WORDS = {"yes", "y", "yeah", "yep", "sure", "ok", "okay", "please", "yes please"}
+NO_WORDS = {"no", "n", "nope", "no thanks", "no thank you", "not needed", "none", "nothing", "no add-ons"}
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y"]
+PHONE_PATTERN = re.compile(r"(\+?\d[\d\s-]{8,14}\d)")
+EVENT_CHOICE_PATTERN = re.compile(r"^(book )?(event )?(\d)$")
+GENERAL_ADMISSION = "General admission only"
+# Step 7 of the system prompt: tickets can only be booked up to a week ahead
+BOOKING_WINDOW_DAYS = 7
+# Step 5 of the system prompt: suggest at most the top 5 events
+MAX_SUGGESTED_EVENTS = 5
+
+# Phrases in an LLM reply that reveal which slot the bot is asking for. A reply matching several of them asks more
+# than one thing at once, so the user's answer is left to the LLM.
+PENDING_SLOT_PATTERNS = [
+    ("contact", re.compile(r"\bname\b.*\bphone\b|\bphone\b.*\bname\b", re.I | re.S)),
+    ("visitor_type", re.compile(r"\bforeign\b.*\blocal\b|\blocal\b.*\bforeign\b", re.I | re.S)),
+    ("date_of_birth", re.compile(r"date of birth", re.I)),
+    ("tickets", re.compile(r"how many\b.*\btickets?\b", re.I | re.S)),
+    ("add_ons", re.compile(r"\badd-?ons?\b|\baudio guide\b|\bcamera\b", re.I)),
+    ("booking_date", re.compile(r"\b(which|what) date\b|\bdate of (your )?visit\b|\btoday or\b", re.I)),
+    ("event", re.compile(r"\bparticular event\b|\bspecial (event|exhibit)", re.I)),
+]
+
+
+def normalise(text: str) -> str:
+    return re.sub(r"[^\w\s+/-]", " ", text.lower()).strip()
+
+
+def parse_yes_no(text: str) -> Optional[bool]:
+    text = " ".join(normalise(text).split())
+    if text in YES_WORDS:
+        return True
+    if text in NO_WORDS:
+        return False
+    return None
+
+
+def parse_visitor_type(text: str) -> Optional[str]:
+    # "No, I am not Indian" must not read as local; any negation goes to the LLM
+    if re.search(r"n['’]t\b", text.lower()):
+        return None
+    words = set(normalise(text).split())
+    if len(words) > 6 or words & NEGATION_WORDS:
+        return None
+    local = bool(words & {"local", "indian", "india"})
+    foreign = bool(words & {"foreign", "foreigner", "international", "tourist", "overseas"})
+    if local == foreign:
+        return None
+    return "local" if local else "foreign"
+
+
+def parse_date(text: str, today: datetime.date = None) -> Optional[datetime.date]:
+    today = today or datetime.date.today()
+    text = " ".join(re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text.strip().rstrip(".").replace(",", " ")).split())
+    if text.lower() == "today":
+        return today
+    if text.lower() == "tomorrow":
+        return today + datetime.timedelta(days=1)
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_ticket_counts(text: str) -> Optional[dict[str, int]]:
+    """
+    Parse answers such as "2 adults and 1 child". Anything beyond counts and categories is left to the LLM.
+    """
+    tokens = normalise(text).replace(",", " ").split()
+    counts = {}
+    remaining = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        count = int(token) if token.isdigit() else NUMBER_WORDS.get(token)
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+        if count is not None and next_token in ("sr", "senior") and i + 2 < len(tokens) \
+                and tokens[i + 2] in ("citizen", "citizens"):
+            i += 1
+            next_token = "sr"
+        if count is not None and next_token in CATEGORY_WORDS:
+            category = CATEGORY_WORDS[next_token]
+            counts[category] = counts.get(category, 0) + count
+            i += 2
+            continue
+        remaining.append(token)
+        i += 1
+    if not counts or any(token not in {"and", "ticket", "tickets", "for", "please", "plus", "&"} for token in remaining):
+        return None
+    return counts
+
+
+def parse_contact(text: str) -> Optional[dict[str, str]]:
+    match = PHONE_PATTERN.search(text)
+    if not match:
+        return None
+    phone_number = re.sub(r"[\s-]", "", match.group(1))
+    name = text[:match.start()] + " " + text[match.end():]
+    name = re.sub(r"(?i)\b(my|name|is|phone|number|mobile|and|i am|i'm|it's)\b|[:,.]", " ", name)
+    name = " ".join(name.split())
+    if not 1 <= len(name.split()) <= 4 or not all(part.isalpha() for part in name.split()):
+        return None
+    return {"name": name.title(), "phone_number": phone_number}
+
+
+def parse_add_ons(text: str, visitor_type: Optional[str]) -> Optional[list[str]]:
+    answer = parse_yes_no(text)
+    if answer is False:
+        return []
+    if answer is True:
+        # Foreign visitors are only offered the camera; a plain "yes" to the local question is ambiguous
+        return None if visitor_type == "local" else ["camera"]
+    words = normalise(text).split()
+    if not words or any(word not in ADD_ON_WORDS for word in words):
+        return None
+    if "both" in words:
+        add_ons = ["audio_guide", "camera"]
+    else:
+        add_ons = [add_on for add_on, word in (("audio_guide", "audio"), ("camera", "camera")) if word in words]
+    # The audio guide price in the system prompt is for Indian citizens only
+    if not add_ons or ("audio_guide" in add_ons and visitor_type != "local"):
+        return None
+    return add_ons
+
+
+def booking_total(slots: dict[str, Any]) -> int:
+    prices = GENERAL_ADMISSION_PRICES[slots["visitor_type"]]
+    tickets = slots.get("tickets", {})
+    # Event tickets come on top of general admission for every visitor
+    total = sum(prices[category] * count for category, count in tickets.items())
+    total += (slots.get("event_price") or 0) * sum(tickets.values())
+    total += sum(ADD_ON_PRICES[add_on] for add_on in slots.get("add_ons", []))
+    return int(total)
+
+
+def age_on(date_of_birth: datetime.date, day: datetime.date) -> int:
+    return day.year - date_of_birth.year - ((day.month, day.day) < (date_of_birth.month, date_of_birth.day))
+
+
+class DialogueEngine:
+    """
+    Hybrid dialogue engine running alongside `RAGService`.
+
+    Booking slots are tracked server-side per chat session. When the bot is waiting on a structured answer
+    (visitor type, date of birth, event, ticket counts, visit date, add-ons, name and phone) and the user's reply
+    parses cleanly, the engine fills the slot and replies from a template that follows the steps of the system
+    prompt. Free-form or ambiguous turns, and every step without a template, go to the LLM.
+    """
+
+    def __init__(self, rag_service: RAGService, session_ttl: int = 24 * 60 * 60):
+        self.rag_service = rag_service
+        self.session_ttl = session_ttl
+
+    def _count(self, counter: str, amount: int = 1):
+        # Counters live in the shared backend so every worker reports the same totals
+        self.rag_service.shared_state.incr(f"dialogue:{counter}", amount)
+
+    def metrics(self) -> dict[str, Any]:
+        counters = {counter: self.rag_service.shared_state.get(f"dialogue:{counter}") or 0
+                    for counter in ("local_turns", "llm_turns", "local_microseconds", "llm_microseconds")}
+        turns = counters["local_turns"] + counters["llm_turns"]
+        return {
+            "local_turns": counters["local_turns"],
+            "llm_turns": counters["llm_turns"],
+            "local_seconds": counters["local_microseconds"] / 1_000_000,
+            "llm_seconds": counters["llm_microseconds"] / 1_000_000,
+            "local_share": counters["local_turns"] / turns if turns else 0.0,
+        }
+
+    def load_state(self, session_id: str) -> dict[str, Any]:
+        return self.rag_service.shared_state.get(f"booking:{session_id}") or {"pending": None, "slots": {}}
+
+    def save_state(self, session_id: str, state: dict[str, Any]):
+        self.rag_service.shared_state.set(f"booking:{session_id}", state, ttl=self.session_ttl)
+
+    def new_state(self, message_list: list[ChatMessage]) -> dict[str, Any]:
+        return {"pending": self.detect_pending_slot(message_list[-1].content), "slots": {}}
+
+    @staticmethod
+    def detect_pending_slot(reply: str) -> Optional[str]:
+        try:
+            reply = json.loads(reply).get("response", reply)
+        except (ValueError, AttributeError):
+            pass
+        if not isinstance(reply, str):
+            return None
+        matches = [slot for slot, pattern in PENDING_SLOT_PATTERNS if pattern.search(reply)]
+        return matches[0] if len(matches) == 1 else None
+
+    def respond(self, question: str, message_list: list[dict[str, Any]],
+                state: dict[str, Any]) -> tuple[list[ChatMessage], dict[str, Any]]:
+        start = time.perf_counter()
+        state = {**state, "slots": state.get("slots", {})}
+        template = None
+        value = self.parse_slot(state.get("pending"), question, state)
+        if value is not None:
+            state["slots"].update(value)
+            template = self.next_template(state["pending"], state)
+
+        if template is not None:
+            reply, suggested, state["pending"] = template
+            message_list = [ChatMessage.from_dict(message) for message in message_list]
+            message_list.append(ChatMessage.from_user(content=question))
+            message_list.append(ChatMessage.from_assistant(
+                content=json.dumps({"response": reply, "suggested": suggested})))
+            self._count("local_turns")
+            self._count("local_microseconds", round((time.perf_counter() - start) * 1_000_000))
+        else:
+            message_list = self.rag_service.query(question=question, message_list=message_list)
+            state["pending"] = self.detect_pending_slot(message_list[-1].content)
+            self._count("llm_turns")
+            self._count("llm_microseconds", round((time.perf_counter() - start) * 1_000_000))
+
+        return message_list, state
+
+    def parse_slot(self, slot: Optional[str], text: str, state: dict[str, Any]) -> Optional[dict[str, Any]]:
+        slots = state["slots"]
+        today = datetime.date.today()
+        if slot == "visitor_type":
+            visitor_type = parse_visitor_type(text)
+            return visitor_type and {"visitor_type": visitor_type}
+        if slot == "date_of_birth":
+            date_of_birth = parse_date(text)
+            if date_of_birth is None or not 0 <= age_on(date_of_birth, today) <= 120:
+                return None
+            return {"date_of_birth": date_of_birth.isoformat()}
+        if slot == "event":
+            # Only an explicit choice is handled here; "no" goes to the LLM, which tries to convince the visitor
+            if normalise(text) == normalise(GENERAL_ADMISSION):
+                return {"event_id": "AA", "event_price": 0, "event_seats": None}
+            offered = state.get("offered_events", [])
+            match = EVENT_CHOICE_PATTERN.match(" ".join(normalise(text).split()))
+            for index, event in enumerate(offered, start=1):
+                if (match and int(match.group(3)) == index) or normalise(text) == normalise(event["name"]):
+                    return {"event_id": event["id"], "event_price": event["price"], "event_seats": event["seats"],
+                            "booking_date": event["date"]}
+            return None
+        if slot == "tickets":
+            counts = parse_ticket_counts(text)
+            allowed = GENERAL_ADMISSION_PRICES.get(slots.get("visitor_type"), {})
+            if counts is None or not set(counts) <= set(allowed) or not sum(counts.values()):
+                return None
+            if slots.get("event_seats") is not None and sum(counts.values()) > slots["event_seats"]:
+                return None
+            # Steps 3, 4 and 6: the date of birth validates the visitor's own category; a mismatch such as a
+            # senior asking for an adult ticket goes to the LLM, which explains the right category
+            if slots.get("date_of_birth"):
+                age = age_on(datetime.date.fromisoformat(slots["date_of_birth"]), today)
+                if not any(low <= age <= high for low, high in (CATEGORY_AGES[category] for category in counts)):
+                    return None
+            return {"tickets": counts}
+        if slot == "booking_date":
+            booking_date = parse_date(text)
+            last_bookable_day = today + datetime.timedelta(days=BOOKING_WINDOW_DAYS)
+            if booking_date is None or not today <= booking_date <= last_bookable_day:
+                return None
+            return {"booking_date": booking_date.isoformat()}
+        if slot == "add_ons":
+            add_ons = parse_add_ons(text, slots.get("visitor_type"))
+            return None if add_ons is None else {"add_ons": add_ons}
+        if slot == "contact":
+            return parse_contact(text)
+        return None
+
+    def offer_events(self) -> list[dict[str, Any]]:
+        today = datetime.date.today()
+        filters = RAGService.event_filters(start_date=today,
+                                           end_date=today + datetime.timedelta(days=BOOKING_WINDOW_DAYS),
+                                           min_available_seats=1)
+        documents = sorted(self.rag_service.view_documents(filters=filters),
+                           key=lambda document: document.meta.get("startDate", ""))
+        return [{
+            "id": document.id,
+            "name": str(document.meta.get("name", "")),
+            # Events that started earlier but are still running are booked for today
+            "date": max(document.meta.get("startDate", "")[:10], today.isoformat()),
+            "price": document.meta.get("ticketPrice") or 0,
+            "seats": document.meta.get("availableSeats"),
+        } for document in documents[:MAX_SUGGESTED_EVENTS]]
+
+    @staticmethod
+    def add_ons_question(slots: dict[str, Any]) -> tuple[str, list[str]]:
+        if slots.get("visitor_type") == "local":
+            return ("Mobile photography is free and selfie sticks are not allowed. Would you like any add-ons: "
+                    "Audio Guide INR 75 or Handheld Camera (without tripod) INR 200?",
+                    ["Add the audio guide", "Add a handheld camera", "No add-ons"])
+        return ("Mobile photography is free and selfie sticks are not allowed. Would you like to add a "
+                "Handheld Camera (without tripod) for INR 200?",
+                ["Add a handheld camera", "Yes, add the camera", "No add-ons"])
+
+    def next_template(self, filled_slot: str, state: dict[str, Any]) -> Optional[tuple[str, list[str], str]]:
+        """
+        Reply to send after `filled_slot` was answered, as `(response, suggested, next pending slot)`.
+        Returns `None` when the next step needs the LLM.
+        """
+        slots = state["slots"]
+        # Prices and add-ons depend on earlier answers; if the LLM collected those, it also handles what follows
+        if filled_slot in ("event", "tickets", "booking_date", "add_ons") and "visitor_type" not in slots:
+            return None
+        if filled_slot in ("tickets", "add_ons") and "tickets" not in slots:
+            return None
+        if filled_slot == "visitor_type":
+            prices = GENERAL_ADMISSION_PRICES[slots["visitor_type"]]
+            price_list = ", ".join(f"{CATEGORY_LABELS[category]} INR {price}" for category, price in prices.items())
+            return (f"The prices for general admission are: {price_list}. "
+                    "May I have your date of birth to confirm your ticket category?",
+                    ["Share my date of birth", "Show me the events", "Why is it needed?"], "date_of_birth")
+        if filled_slot == "date_of_birth":
+            state["offered_events"] = self.offer_events()
+            if not state["offered_events"]:
+                return None
+            events = "; ".join(f"{index}. {event['name']} on {event['date']}, INR {event['price']}"
+                               for index, event in enumerate(state["offered_events"], start=1))
+            return ("Thank you. Would you like to book a ticket for any of these events along with general "
+                    f"admission? {events}.", ["Book event 1", GENERAL_ADMISSION, "Let me think about it"], "event")
+        if filled_slot == "event":
+            categories = GENERAL_ADMISSION_PRICES[slots["visitor_type"]]
+            labels = ", ".join(CATEGORY_LABELS[category] for category in categories)
+            first = "1 adult" if "adult" in categories else "1 foreigner"
+            return (f"How many tickets would you like to book under each category? Categories: {labels}.",
+                    [first, f"2 {first.split()[1]}s and 1 child", "Let me check first"], "tickets")
+        if filled_slot == "tickets":
+            total = f"Your total for these tickets is INR {booking_total(slots)}. "
+            if slots.get("event_id", "AA") != "AA":
+                # Step 7: the event's date is assumed, so go straight to the add-ons
+                question, suggested = self.add_ons_question(slots)
+                return total + question, suggested, "add_ons"
+            return (total + f"Would you like to visit today or on a later date within the next {BOOKING_WINDOW_DAYS} "
+                    "days? Please share the date in YYYY-MM-DD format.", ["Today", "Tomorrow", "Not sure yet"],
+                    "booking_date")
+        if filled_slot == "booking_date":
+            question, suggested = self.add_ons_question(slots)
+            return question, suggested, "add_ons"
+        if filled_slot == "add_ons":
+            return (f"Your total comes to INR {booking_total(slots)}. Please share your name and phone number.",
+                    ["I'll share my details", "Proceed with the booking", "Can I change something?"], "contact")
+        return None
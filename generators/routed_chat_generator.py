@@ -0,0 +1,215 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from haystack import component, default_from_dict, default_to_dict
+from haystack.core.serialization import component_from_dict, component_to_dict, import_class_by_name
+from haystack.dataclasses import ChatMessage, ChatRole
+from haystack.utils import deserialize_callable, serialize_callable
+
+from shared_state import InMemoryStateBackend, SharedStateBackend
+
+# Markers of the retry messages `JsonSchemaValidator` sends back when a reply is not valid JSON or breaks the schema
+VALIDATION_ERROR_MARKERS = (
+    "The following generated JSON does not conform to the provided schema",
+    "Please provide only a valid JSON object in string format.",
+)
+
+TRIVIAL_TURNS = {
+    "hi", "hello", "hey", "namaste", "good morning", "good afternoon", "good evening",
+    "yes", "y", "yeah", "yep", "sure", "ok", "okay", "no", "nope", "thanks", "thank you",
+    "yes please", "yes proceed", "proceed", "go ahead", "continue", "next", "no thanks", "no thank you",
+}
+SUMMARY_PATTERN = re.compile(r"\b(ready to pay|summary|confirm (the |your )?booking|payment)\b", re.I)
+
+
+def is_validation_retry(message: ChatMessage) -> bool:
+    return message.role == ChatRole.USER and any(marker in (message.content or "")
+                                                 for marker in VALIDATION_ERROR_MARKERS)
+
+
+def classify_turn(messages: List[ChatMessage]) -> str:
+    """
+    Pick a route for the next reply from the conversation state.
+
+    - `strong`: the final booking summary (the user asks for it or answers the bot's "ready to pay" question).
+    - `fast`: greetings and acknowledgements such as "yes, proceed", which carry nothing to extract.
+    - `standard`: everything else, including the opening system-prompt turn.
+    """
+    last = messages[-1]
+    if last.role != ChatRole.USER:
+        return "standard"
+
+    text = " ".join(re.sub(r"[^\w\s]", " ", last.content.lower()).split())
+    previous_reply = next((message.content for message in reversed(messages[:-1])
+                           if message.role == ChatRole.ASSISTANT), "")
+    if SUMMARY_PATTERN.search(text) or (SUMMARY_PATTERN.search(previous_reply) and text in TRIVIAL_TURNS):
+        return "strong"
+    if text in TRIVIAL_TURNS:
+        return "fast"
+    return "standard"
+
+
+@component
+class RoutedChatGenerator:
+    def __init__(
+            self,
+            routes: Dict[str, Dict[str, Any]],
+            classifier: Callable[[List[ChatMessage]], str] = classify_turn,
+            default_route: str = "standard",
+            fallback_route: str = "strong",
+            shared_state: Optional[SharedStateBackend] = None,
+            metrics_prefix: str = "routing",
+    ):
+        """
+        Initialize the RoutedChatGenerator component.
+
+        :param routes:
+            Route name to route settings. Each route needs a `generator` (any chat generator with
+            `run(messages)` returning `replies`) and may set `latency_budget` in seconds and
+            `cost_per_million_tokens` as an `(input, output)` tuple in USD.
+        :param classifier:
+            Callable returning the route name for a list of messages.
+        :param default_route:
+            The route serving every turn the classifier has no better choice for, including unknown routes. Its
+            budget is only tracked, not enforced. Any other route except `fallback_route` that exceeds its budget
+            is abandoned and the turn is answered by this route instead.
+        :param fallback_route:
+            The strongest route, used for retries after the reply failed schema validation. Its budget is only
+            tracked, not enforced.
+        :param shared_state:
+            Backend holding the metric counters, so that every worker reports the same totals.
+            Defaults to a process-local backend.
+        :param metrics_prefix:
+            Prefix of the metric keys in `shared_state`.
+        """
+        self.routes = routes
+        self.classifier = classifier
+        self.default_route = default_route
+        self.fallback_route = fallback_route
+        self.shared_state = shared_state or InMemoryStateBackend()
+        self.metrics_prefix = metrics_prefix
+        # The schema retry runs on the same thread as the failed call within one pipeline run, so the route that
+        # produced the failed reply is tracked per thread rather than on the shared component
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="routed-chat-generator")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+
+        :returns: Dictionary with serialized data.
+        """
+        routes = {
+            name: {**{key: value for key, value in route.items() if key != "generator"},
+                   "generator": component_to_dict(route["generator"])}
+            for name, route in self.routes.items()
+        }
+        return default_to_dict(self, routes=routes, classifier=serialize_callable(self.classifier),
+                               default_route=self.default_route, fallback_route=self.fallback_route,
+                               metrics_prefix=self.metrics_prefix)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RoutedChatGenerator":
+        """
+        Deserializes the component from a dictionary.
+
+        :param data: Dictionary to deserialize from.
+        :returns: Deserialized component.
+        """
+        init_parameters = data["init_parameters"]
+        for name, route in init_parameters["routes"].items():
+            generator = route["generator"]
+            route["generator"] = component_from_dict(import_class_by_name(generator["type"]), generator, name)
+        init_parameters["classifier"] = deserialize_callable(init_parameters["classifier"])
+        return default_from_dict(cls, data)
+
+    def _key(self, route: str, counter: str) -> str:
+        return f"{self.metrics_prefix}:{route}:{counter}"
+
+    def _count(self, route: str, counter: str, amount: int = 1):
+        self.shared_state.incr(self._key(route, counter), amount)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-route call counts, latency, latency-budget misses and timeouts, schema failure rate and estimated cost,
+        accumulated over every worker sharing the state backend.
+        """
+        metrics = {}
+        for name, route in self.routes.items():
+            counters = {counter: self.shared_state.get(self._key(name, counter)) or 0 for counter in
+                        ("calls", "latency_microseconds", "budget_misses", "timeouts", "schema_failures",
+                         "cost_nano_usd")}
+            calls = counters["calls"]
+            metrics[name] = {
+                "calls": calls,
+                "avg_latency_seconds": counters["latency_microseconds"] / calls / 1_000_000 if calls else 0.0,
+                "latency_budget": route.get("latency_budget"),
+                "budget_misses": counters["budget_misses"],
+                "timeouts": counters["timeouts"],
+                "schema_failures": counters["schema_failures"],
+                "schema_failure_rate": counters["schema_failures"] / calls if calls else 0.0,
+                "cost_usd": counters["cost_nano_usd"] / 1_000_000_000,
+            }
+        return metrics
+
+    def _generate(self, route: str, messages: List[ChatMessage]) -> Optional[List[ChatMessage]]:
+        """
+        Run the route's generator, returning `None` if it exceeded an enforced latency budget.
+        """
+        settings = self.routes[route]
+        budget = settings.get("latency_budget")
+        start = time.perf_counter()
+        if budget is None or route in (self.default_route, self.fallback_route):
+            replies = settings["generator"].run(messages=messages)["replies"]
+        else:
+            future = self._executor.submit(settings["generator"].run, messages=messages)
+            try:
+                replies = future.result(timeout=budget)["replies"]
+            except FutureTimeoutError:
+                # The call cannot be interrupted; its reply is discarded when it eventually arrives
+                replies = None
+        latency = time.perf_counter() - start
+
+        self._count(route, "calls")
+        self._count(route, "latency_microseconds", round(latency * 1_000_000))
+        if budget is not None and latency > budget:
+            self._count(route, "budget_misses")
+        if replies is None:
+            self._count(route, "timeouts")
+
+        input_price, output_price = settings.get("cost_per_million_tokens", (0.0, 0.0))
+        # Roughly four characters per token; good enough to compare routes against each other. An abandoned call
+        # is still billed, so at least its input tokens are charged.
+        input_tokens = sum(len(message.content or "") for message in messages) / 4
+        output_tokens = sum(len(reply.content or "") for reply in replies or []) / 4
+        self._count(route, "cost_nano_usd", round((input_tokens * input_price + output_tokens * output_price) * 1000))
+        return replies
+
+    @component.output_types(replies=List[ChatMessage])
+    def run(self, messages: List[ChatMessage]) -> Dict[str, List[ChatMessage]]:
+        """
+        Generate a reply with the generator of the route chosen for these messages.
+
+        :param messages: The conversation so far, or the validator's retry message.
+        :returns: A dictionary with the generated `replies`.
+        """
+        if messages and is_validation_retry(messages[-1]):
+            failed_route = getattr(self._local, "last_route", None)
+            if failed_route:
+                self._count(failed_route, "schema_failures")
+            route = self.fallback_route
+        else:
+            route = self.classifier(messages)
+            if route not in self.routes:
+                route = self.default_route
+
+        replies = self._generate(route, messages)
+        if replies is None:
+            # Retry on the default route rather than the slower fallback so a missed budget costs as little as possible
+            route = self.default_route
+            replies = self._generate(route, messages)
+        self._local.last_route = route
+        return {"replies": replies}
@@ -1,21 +1,31 @@
+import datetime
 import json
 import os
+import tempfile
+import uuid
 from contextlib import asynccontextmanager
+from typing import Iterable, Iterator
 
 import google.generativeai as genai
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from haystack import Document
 import stripe
 from fastapi.params import Body
 
+from dialogue_engine import DialogueEngine
 from mongo_client import MongoDBClient
 from rag_service import RAGService
+from shared_state import shared_state_from_env
 from utils import extract_json
 
 load_dotenv()
 
 mongo_client = MongoDBClient(uri=os.getenv("MONGO_CONNECTION_STRING"))
+shared_state = shared_state_from_env(mongo_client)
 stripe.api_key = os.getenv("STRIPE_API_KEY")
 
 
@@ -147,8 +157,10 @@ rag_service = RAGService(
         "top_k": 64,
         "max_output_tokens": 8192,
         "response_mime_type": "application/json",
-    }
+    },
+    shared_state=shared_state,
 )
+dialogue_engine = DialogueEngine(rag_service)
 
 
 @app.get("/")
@@ -169,15 +181,32 @@ async def generate_text(prompt: dict):
 
 
 @app.post("/chat/new")
-async def new_chat():
+def new_chat():
+    # Plain `def` handlers for chat so that blocking Gemini, Weaviate and shared-state calls run in FastAPI's
+    # threadpool instead of holding up the worker's event loop
     message_list = rag_service.new_chat()
-    return {"message_list": message_list}
+    session_id = str(uuid.uuid4())
+    rag_service.save_session(session_id, message_list)
+    dialogue_engine.save_state(session_id, dialogue_engine.new_state(message_list))
+    return {"message_list": message_list, "session_id": session_id}
 
 
 @app.post("/chat")
-async def chat(conversation: dict):
-    new_message_list = rag_service.query(question=conversation["query"],
-                              message_list=conversation["message_list"])
+def chat(conversation: dict):
+    session_id = conversation.get("session_id")
+    if session_id:
+        # Sessions live in the shared backend so any worker or node can serve the next turn
+        message_list = rag_service.load_session(session_id)
+        if message_list is None:
+            raise HTTPException(status_code=404, detail="Chat session not found or expired")
+        # Structured slot-filling answers are served from templates; everything else falls through to the LLM
+        new_message_list, state = dialogue_engine.respond(conversation["query"], message_list,
+                                                          dialogue_engine.load_state(session_id))
+        rag_service.save_session(session_id, new_message_list)
+        dialogue_engine.save_state(session_id, state)
+    else:
+        new_message_list = rag_service.query(question=conversation["query"],
+                                             message_list=conversation["message_list"])
     try:
         json_ = json.loads(new_message_list[-1].content)
         if "response" in json_:
@@ -195,15 +224,110 @@ async def chat(conversation: dict):
     return {"message_list": new_message_list}
 
 
+def project_document(document: Document, fields: list[str] | None) -> dict:
+    document = document.to_dict(flatten=False)
+    if fields is None:
+        document.pop("embedding", None)
+        return document
+    return {field: document[field] for field in fields if field in document}
+
+
+@app.get("/metrics/routing")
+async def routing_metrics():
+    return rag_service.routing_metrics()
+
+
+@app.get("/metrics/dialogue")
+async def dialogue_metrics():
+    return dialogue_engine.metrics()
+
+
 @app.get("/documents")
-async def view_documents():
-    return rag_service.view_documents()
+async def view_documents(cursor: uuid.UUID | None = None, limit: int = Query(100, ge=1, le=1000),
+                         fields: str | None = None, stream: bool = False):
+    """
+    Page through the documents. `fields` is a comma separated projection; `embedding` is excluded unless listed.
+    With `stream=true` every document is sent as NDJSON, one line per document, fetched `limit` at a time.
+    """
+    fields = fields.split(",") if fields else None
+    include_embedding = fields is not None and "embedding" in fields
+    if stream:
+        def lines():
+            for document in rag_service.stream_documents(page_size=limit, include_embedding=include_embedding):
+                yield json.dumps(project_document(document, fields), default=str) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    # `cursor` is typed as a UUID so that a malformed one is rejected with a 422 before it reaches Weaviate
+    documents, next_cursor = await run_in_threadpool(rag_service.page_documents, cursor and str(cursor), limit,
+                                                     include_embedding)
+    return {"documents": [project_document(document, fields) for document in documents], "next_cursor": next_cursor}
+
+
+@app.get("/events/search")
+async def search_events(query: str, start_date: datetime.date | None = None, end_date: datetime.date | None = None,
+                        category: str | None = None, min_available_seats: int | None = Query(None, ge=0),
+                        top_k: int = Query(5, ge=1, le=100), fields: str | None = None):
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=422, detail="end_date must not be before start_date")
+    filters = rag_service.event_filters(start_date=start_date, end_date=end_date, category=category,
+                                        min_available_seats=min_available_seats)
+    documents = await run_in_threadpool(rag_service.search_events, query, filters, top_k)
+    fields = fields.split(",") if fields else None
+    return {"documents": [project_document(document, fields) for document in documents]}
+
+
+def parse_ndjson_documents(lines: Iterable[bytes], errors: list[dict]) -> Iterator[Document]:
+    """
+    Parse one document per NDJSON line. Malformed lines are skipped and recorded in `errors` with their line number.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+            document = Document.from_dict(data)
+        except (ValueError, TypeError) as e:
+            errors.append({"error": str(e), "line": line_number})
+            continue
+        yield document
 
 
 @app.post("/documents")
-async def add_documents(docs: list):
-    rag_service.add_documents(docs)
-    return {"message": "Documents added successfully"}
+def add_documents(docs: list):
+    # A plain `def` so that FastAPI runs the blocking embedding calls in its threadpool
+    total = 0
+    for total in rag_service.ingest_documents(Document.from_dict(doc) for doc in docs):
+        pass
+    return {"message": "Documents added successfully", "count": total}
+
+
+@app.post("/documents/bulk")
+async def bulk_add_documents(request: Request, chunk_size: int = Query(256, ge=1, le=1000)):
+    """
+    Ingest an NDJSON upload (one document per line), embedding and upserting it `chunk_size` documents at a time.
+    The response is an NDJSON stream with one progress update per chunk written and one error per malformed line.
+    """
+    # Spool the body to disk so memory stays bounded and the upload is fully read before the response starts
+    upload = tempfile.TemporaryFile()
+    async for data in request.stream():
+        upload.write(data)
+    upload.seek(0)
+
+    def progress():
+        errors = []
+        total = 0
+        with upload:
+            for total in rag_service.ingest_documents(parse_ndjson_documents(upload, errors), chunk_size=chunk_size):
+                yield from (json.dumps(error) + "\n" for error in errors)
+                errors.clear()
+                yield json.dumps({"ingested": total}) + "\n"
+        yield from (json.dumps(error) + "\n" for error in errors)
+        yield json.dumps({"ingested": total, "done": True}) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
 
 
 @app.post("/refresh")
@@ -237,4 +361,12 @@ async def confirm_payment_intent(payment_intent_id: str):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    # Each worker is a separate process with its own singletons; shared state goes through SHARED_STATE_BACKEND.
+    # Run several nodes by pointing them at the same Mongo/Redis backend behind a load balancer.
+    # shared_state_from_env() only sees the worker count through WEB_CONCURRENCY. `uvicorn --workers N` and
+    # `gunicorn -w N` do not pass their flag on to the workers, so start several workers either with
+    # WEB_CONCURRENCY=N (which both CLIs use as their default) or with SHARED_STATE_BACKEND=mongo/redis set;
+    # otherwise each worker silently keeps its own in-memory sessions.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("main:app", host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", "8000")),
+                workers=workers, reload=workers == 1)
@@ -22,10 +22,44 @@ class MongoDBClient:
     def close(self):
         self.db.close()
 
+    @staticmethod
+    def _to_iso_date(value: Any) -> Optional[str]:
+        if isinstance(value, str):
+            try:
+                value = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+        if not isinstance(value, datetime.datetime):
+            return None
+        # Mongo returns naive UTC datetimes; the document store needs RFC 3339 with an offset to index them as dates
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.isoformat()
+
+    @staticmethod
+    def _to_number(value: Any, type_: type) -> Optional[int | float]:
+        try:
+            return type_(value)
+        except (TypeError, ValueError):
+            return None
+
     @staticmethod
     def mongo_event_doc_to_haystack_doc(mongo_doc: dict[str, Any]) -> Document:
         id: ObjectId = mongo_doc.pop("_id")
-        doc: Document = Document(id=str(id), content=json.dumps(mongo_doc, default=str), meta={"name": mongo_doc["name"]})
+        category = mongo_doc.get("category")
+        start_date = MongoDBClient._to_iso_date(mongo_doc.get("startDate"))
+        meta = {
+            "name": mongo_doc["name"],
+            # Stored lower-cased so that the exact-match category filter is case-insensitive
+            "category": category.strip().lower() if isinstance(category, str) else None,
+            "startDate": start_date,
+            # Single-day events have no end date; without one every date-range filter would drop them
+            "endDate": MongoDBClient._to_iso_date(mongo_doc.get("endDate")) or start_date,
+            "availableSeats": MongoDBClient._to_number(mongo_doc.get("availableSeats"), int),
+            "ticketPrice": MongoDBClient._to_number(mongo_doc.get("ticketPrice"), float),
+        }
+        doc: Document = Document(id=str(id), content=json.dumps(mongo_doc, default=str),
+                                 meta={key: value for key, value in meta.items() if value is not None})
         return doc
 
     def get_user_by_email(self, email: str):
@@ -53,45 +53,87 @@
 #     }
 # },
 # )
+import base64
+import datetime
 import json
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from haystack import Pipeline, Document
 from haystack.components.builders import PromptBuilder
-from haystack.components.joiners import BranchJoiner
+from haystack.components.joiners import BranchJoiner, DocumentJoiner
 from haystack.components.validators import JsonSchemaValidator
 from haystack.dataclasses import ChatMessage
 from haystack.document_stores.types import DuplicatePolicy
 from haystack.utils.auth import Secret
 from haystack_integrations.components.generators.google_ai.chat.gemini import \
     GoogleAIGeminiChatGenerator
-from haystack_integrations.components.retrievers.weaviate import WeaviateEmbeddingRetriever
+from haystack_integrations.components.retrievers.weaviate import WeaviateBM25Retriever, WeaviateEmbeddingRetriever
 from haystack_integrations.document_stores.weaviate import WeaviateDocumentStore
+from haystack_integrations.document_stores.weaviate.document_store import DOCUMENT_COLLECTION_PROPERTIES
 
 from converters.prompt_to_chatmessage_converter import PromptToChatMessage
 from embedders.gemini_document_embedder import GeminiDocumentEmbedder
 from embedders.gemini_text_embedder import GeminiTextEmbedder
+from generators.routed_chat_generator import RoutedChatGenerator
 from mongo_client import MongoDBClient
+from shared_state import InMemoryStateBackend, SharedStateBackend, VersionedCache
+
+# Model per route with its latency budget in seconds and (input, output) price in USD per million tokens.
+# The `standard` route uses the `model` passed to `RAGService`. Only the `fast` budget is enforced: a fast call that
+# runs over is answered by `standard` instead; the other budgets are tracked in the routing metrics.
+DEFAULT_ROUTES = {
+    "fast": {"model": "gemini-1.5-flash-8b", "latency_budget": 1.5, "cost_per_million_tokens": (0.0375, 0.15)},
+    "standard": {"latency_budget": 4.0, "cost_per_million_tokens": (0.075, 0.30)},
+    "strong": {"model": "gemini-1.5-pro", "latency_budget": 12.0, "cost_per_million_tokens": (1.25, 5.00)},
+}
+
+# Typed event metadata written by `MongoDBClient.mongo_event_doc_to_haystack_doc`. Range filters on dates and
+# numbers are served from Weaviate's range index instead of scanning every object.
+EVENT_PROPERTIES = [
+    {"name": "name", "dataType": ["text"]},
+    {"name": "category", "dataType": ["text"], "tokenization": "field"},
+    {"name": "startDate", "dataType": ["date"], "indexRangeFilters": True},
+    {"name": "endDate", "dataType": ["date"], "indexRangeFilters": True},
+    {"name": "availableSeats", "dataType": ["int"], "indexRangeFilters": True},
+    {"name": "ticketPrice", "dataType": ["number"], "indexRangeFilters": True},
+]
 
 
 class RAGService:
     def __init__(self, env_var_name: str, prompt: str, system_prompt: str = None, output_schema: dict[str, Any] = None,
-                 model: str = "gemini-1.5-flash", generation_config: dict[str, Any] = None):
+                 model: str = "gemini-1.5-flash", generation_config: dict[str, Any] = None,
+                 shared_state: SharedStateBackend = None, routes: dict[str, dict[str, Any]] = None):
         self.api_key = Secret.from_env_var(env_var_name)
         self.prompt = prompt
-        self.document_store = WeaviateDocumentStore(url="http://127.0.0.1:8080")
+        # Collection settings only apply when the collection is created; drop an existing one to pick them up
+        self.document_store = WeaviateDocumentStore(url="http://127.0.0.1:8080", collection_settings={
+            "class": "Default",
+            "invertedIndexConfig": {"indexNullState": True},
+            # Custom properties replace the store's defaults rather than extending them
+            "properties": DOCUMENT_COLLECTION_PROPERTIES + EVENT_PROPERTIES,
+        })
         self.model = model
         self.system_prompt = system_prompt
         self.output_schema = output_schema
+        self.shared_state = shared_state or InMemoryStateBackend()
+        self.documents_cache = VersionedCache(self.shared_state, "document_store_version")
+        self._collection_properties = None
 
         self.document_embedder = GeminiDocumentEmbedder(api_key=self.api_key)
         self.query_embedder = GeminiTextEmbedder(api_key=self.api_key)
         self.retriever = WeaviateEmbeddingRetriever(document_store=self.document_store)
         self.prompt_builder = PromptBuilder(template=self.prompt)
         self.prompt_to_chat_message_converter = PromptToChatMessage(prompt=self.prompt)
-        self.generator = GoogleAIGeminiChatGenerator(model=self.model, generation_config=generation_config)
+        self.routes = {
+            name: {**route, "generator": route.get("generator") or GoogleAIGeminiChatGenerator(
+                model=route.get("model", self.model), generation_config=generation_config)}
+            for name, route in (routes or DEFAULT_ROUTES).items()
+        }
+        self.generator = RoutedChatGenerator(routes=self.routes, shared_state=self.shared_state)
         self.branch_joiner = BranchJoiner(list[ChatMessage])
         self.schema_validator = JsonSchemaValidator()
+        self.bm25_retriever = WeaviateBM25Retriever(document_store=self.document_store)
+        self.document_joiner = DocumentJoiner(join_mode="reciprocal_rank_fusion")
 
         self.pipeline = Pipeline()
         # self.rag.add_component("query_embedder", self.query_embedder)
@@ -114,6 +156,20 @@ class RAGService:
         self.pipeline.connect("generator.replies", "schema_validator.messages")
         self.pipeline.connect("schema_validator.validation_error", "branch_joiner")
 
+        # Hybrid event search: BM25 and embedding similarity over the same pre-filtered candidates, fused by RRF
+        self.search_pipeline = Pipeline()
+        self.search_pipeline.add_component("query_embedder", self.query_embedder)
+        self.search_pipeline.add_component("embedding_retriever", self.retriever)
+        self.search_pipeline.add_component("bm25_retriever", self.bm25_retriever)
+        self.search_pipeline.add_component("document_joiner", self.document_joiner)
+
+        self.search_pipeline.connect("query_embedder.embedding", "embedding_retriever.query_embedding")
+        self.search_pipeline.connect("embedding_retriever", "document_joiner")
+        self.search_pipeline.connect("bm25_retriever", "document_joiner")
+
+    def routing_metrics(self) -> dict[str, dict[str, Any]]:
+        return self.generator.metrics()
+
     def __del__(self):
         try:
             self.document_store.client.close()
@@ -130,7 +186,7 @@ class RAGService:
     def new_chat(self):
         result = self.pipeline.run({
             "prompt": {"template": self.system_prompt,
-                       "template_variables": {"documents": self.view_documents()}},
+                       "template_variables": {"documents": self.cached_documents()}},
             "prompt_to_chat_message_converter": {"message_list": [], "role": "system"},
             "schema_validator": self.output_schema,
         }, include_outputs_from={"prompt_to_chat_message_converter", "generator"})
@@ -145,18 +201,126 @@ class RAGService:
         }, include_outputs_from={"prompt_to_chat_message_converter", "generator"})
         return self._parse_output(result)
 
+    @staticmethod
+    def event_filters(start_date: datetime.date | None = None, end_date: datetime.date | None = None,
+                      category: str | None = None, min_available_seats: int | None = None) -> dict[str, Any] | None:
+        """
+        Build Haystack filters selecting events that overlap the days `start_date` to `end_date` (both inclusive,
+        UTC), belong to `category` (case-insensitive) and have at least `min_available_seats` seats left.
+        """
+        conditions = []
+        if start_date:
+            start = datetime.datetime.combine(start_date, datetime.time(), tzinfo=datetime.timezone.utc)
+            conditions.append({"field": "meta.endDate", "operator": ">=", "value": start.isoformat()})
+        if end_date:
+            # Events starting at any time on `end_date` count, so compare against the start of the next day
+            end = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time(),
+                                            tzinfo=datetime.timezone.utc)
+            conditions.append({"field": "meta.startDate", "operator": "<", "value": end.isoformat()})
+        if category:
+            # Categories are stored lower-cased by `MongoDBClient.mongo_event_doc_to_haystack_doc`
+            conditions.append({"field": "meta.category", "operator": "==", "value": category.strip().lower()})
+        if min_available_seats is not None:
+            conditions.append({"field": "meta.availableSeats", "operator": ">=", "value": min_available_seats})
+        return {"operator": "AND", "conditions": conditions} if conditions else None
+
+    def search_events(self, query: str, filters: dict[str, Any] | None = None, top_k: int = 5) -> list[Document]:
+        # Each retriever over-fetches so that fusion can promote documents ranked well by only one of them
+        result = self.search_pipeline.run({
+            "query_embedder": {"text": query},
+            "embedding_retriever": {"filters": filters, "top_k": top_k * 2},
+            "bm25_retriever": {"query": query, "filters": filters, "top_k": top_k * 2},
+            "document_joiner": {"top_k": top_k},
+        })
+        return result["document_joiner"]["documents"]
+
     def view_documents(self, filters: dict[str, Any] | None = None):
         return self.document_store.filter_documents(filters=filters)
 
+    def collection_properties(self) -> list[str]:
+        if self._collection_properties is None:
+            self._collection_properties = [prop.name for prop in self.document_store.collection.config.get().properties]
+        return self._collection_properties
+
+    @staticmethod
+    def object_to_document(obj) -> Document:
+        """
+        Convert a Weaviate object fetched straight from the collection into a `Document`, the way
+        `WeaviateDocumentStore` maps the objects returned by its own queries.
+        """
+        data = dict(obj.properties)
+        data["id"] = data.pop("_original_id")
+        data["embedding"] = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector or None
+        blob_data, blob_mime_type = data.pop("blob_data", None), data.pop("blob_mime_type", None)
+        if blob_data:
+            data["blob"] = {"data": base64.b64decode(blob_data), "mime_type": blob_mime_type}
+        for key, value in data.items():
+            if isinstance(value, datetime.datetime):
+                data[key] = value.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return Document.from_dict(data)
+
+    def page_documents(self, cursor: str | None = None, limit: int = 100,
+                       include_embedding: bool = False) -> tuple[list[Document], str | None]:
+        # Weaviate's cursor API walks the collection by object UUID without materialising the whole store
+        # Blob properties are only returned when asked for, so request every property as the store's own queries do
+        result = self.document_store.collection.query.fetch_objects(limit=limit, after=cursor,
+                                                                   include_vector=include_embedding,
+                                                                   return_properties=self.collection_properties())
+        documents = [self.object_to_document(obj) for obj in result.objects]
+        next_cursor = str(result.objects[-1].uuid) if result.objects and len(result.objects) == limit else None
+        return documents, next_cursor
+
+    def stream_documents(self, page_size: int = 100, include_embedding: bool = False) -> Iterator[Document]:
+        cursor = None
+        while True:
+            documents, cursor = self.page_documents(cursor=cursor, limit=page_size,
+                                                    include_embedding=include_embedding)
+            yield from documents
+            if cursor is None:
+                return
+
+    def cached_documents(self):
+        # Reloaded only when some worker has changed the document store since this worker last read it
+        return self.documents_cache.get(self.view_documents)
+
     def add_documents(self, documents: list[Document]):
         self.document_store.write_documents(documents, policy=DuplicatePolicy.OVERWRITE)
+        self.documents_cache.invalidate()
+
+    def ingest_documents(self, documents: Iterable[Document], chunk_size: int = 256) -> Iterator[int]:
+        """
+        Embed and upsert documents chunk by chunk, yielding the running total after each chunk.
+
+        Only one chunk is held in memory at a time, so `documents` can be a lazy iterator over a large upload.
+        """
+        total = 0
+        chunk = []
+        for document in documents:
+            chunk.append(document)
+            if len(chunk) == chunk_size:
+                total += self.embed_and_add_documents(chunk)
+                chunk = []
+                yield total
+        if chunk:
+            total += self.embed_and_add_documents(chunk)
+            yield total
+
+    def embed_and_add_documents(self, documents: list[Document]) -> int:
+        documents = self.document_embedder.run(documents=documents)["documents"]
+        self.add_documents(documents)
+        return len(documents)
 
     def delete_documents(self, document_ids: list[str]):
         self.document_store.delete_documents(document_ids=document_ids)
+        self.documents_cache.invalidate()
+
+    def save_session(self, session_id: str, message_list: list[ChatMessage], ttl: int = 24 * 60 * 60):
+        self.shared_state.set(f"session:{session_id}", [message.to_dict() for message in message_list], ttl=ttl)
+
+    def load_session(self, session_id: str) -> list[dict[str, Any]] | None:
+        return self.shared_state.get(f"session:{session_id}")
 
     def refresh_document_store(self, mongo_client: MongoDBClient):
         events = mongo_client.get_collection("events")
-        docs = \
-            self.document_embedder.run(documents=[mongo_client.mongo_event_doc_to_haystack_doc(doc)
-                                                  for doc in events.find()])["documents"]
-        self.add_documents(docs)
+        for _ in self.ingest_documents(mongo_client.mongo_event_doc_to_haystack_doc(doc) for doc in events.find()):
+            pass
@@ -0,0 +1,195 @@
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from pymongo import ReturnDocument
+
+from mongo_client import MongoDBClient
+
+
+class SharedStateBackend:
+    """
+    Key-value store shared by every worker serving the API.
+
+    Values are JSON-serialized so that every backend stores the same representation.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+
+class InMemoryStateBackend(SharedStateBackend):
+    """
+    Process-local backend. Only safe with a single worker; use it for development.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (json.dumps(value, default=str), expires_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value, expires_at = self._data.get(key, ("0", None))
+            value = int(json.loads(value)) + amount
+            self._data[key] = (json.dumps(value), expires_at)
+            return value
+
+
+class MongoStateBackend(SharedStateBackend):
+    """
+    Backend storing shared state in a MongoDB collection, reusing the application's `MongoDBClient`.
+    """
+
+    def __init__(self, mongo_client: MongoDBClient, collection_name: str = "shared_state"):
+        self.mongo_client = mongo_client
+        self.collection_name = collection_name
+        self._index_created = False
+
+    def _collection(self):
+        collection = self.mongo_client.get_collection(self.collection_name)
+        if not self._index_created:
+            # Mongo's TTL monitor removes expired entries; get() also checks expiry since the monitor runs lazily.
+            collection.create_index("expiresAt", expireAfterSeconds=0)
+            self._index_created = True
+        return collection
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._collection().find_one({"_id": key})
+        if item is None:
+            return None
+        expires_at = item.get("expiresAt")
+        if expires_at is not None and expires_at < datetime.datetime.utcnow():
+            return None
+        if "counter" in item:
+            return item["counter"]
+        return json.loads(item["value"])
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl) if ttl else None
+        self._collection().replace_one(
+            {"_id": key}, {"_id": key, "value": json.dumps(value, default=str), "expiresAt": expires_at},
+            upsert=True
+        )
+
+    def delete(self, key: str):
+        self._collection().delete_one({"_id": key})
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        # Counters are stored as a native integer so that $inc stays atomic across workers and nodes.
+        item = self._collection().find_one_and_update(
+            {"_id": key}, {"$inc": {"counter": amount}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return item["counter"]
+
+
+class RedisStateBackend(SharedStateBackend):
+    """
+    Backend for Redis or any Redis-compatible server (e.g. a local Valkey/KeyDB instance).
+    """
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", prefix: str = "sarathi:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self.client.incr(self.prefix + key, amount)
+
+
+class VersionedCache:
+    """
+    Worker-local cache invalidated through a version counter kept in the shared backend.
+
+    Any worker that changes the underlying data calls `invalidate()`, which bumps the shared version;
+    every other worker notices the new version on its next `get()` and reloads.
+    """
+
+    def __init__(self, backend: SharedStateBackend, version_key: str):
+        self.backend = backend
+        self.version_key = version_key
+        self._value: Any = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def current_version(self) -> int:
+        return self.backend.get(self.version_key) or 0
+
+    def get(self, loader: Callable[[], Any]) -> Any:
+        version = self.current_version()
+        with self._lock:
+            if self._version != version:
+                self._value = loader()
+                self._version = version
+            return self._value
+
+    def invalidate(self) -> int:
+        with self._lock:
+            self._version = None
+            self._value = None
+        return self.backend.incr(self.version_key)
+
+
+def shared_state_from_env(mongo_client: MongoDBClient) -> SharedStateBackend:
+    """
+    Build the shared state backend selected by the `SHARED_STATE_BACKEND` environment variable.
+
+    Supported values are `memory` (default, single worker only), `mongo` and `redis`.
+    The Redis URL is read from `REDIS_URL`.
+
+    The `memory` backend is refused when `WEB_CONCURRENCY` asks for more than one worker. An explicit
+    `uvicorn --workers N` or `gunicorn -w N` is not visible to the workers and is not caught, so multi-worker
+    deployments must set the worker count through `WEB_CONCURRENCY` or select `mongo`/`redis` explicitly.
+    """
+    backend = os.getenv("SHARED_STATE_BACKEND", "memory").lower()
+    if backend == "memory":
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            raise RuntimeError("Running multiple workers requires SHARED_STATE_BACKEND=mongo or redis.")
+        return InMemoryStateBackend()
+    if backend == "mongo":
+        return MongoStateBackend(mongo_client)
+    if backend == "redis":
+        return RedisStateBackend(url=os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"))
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND '{backend}'. Expected one of: memory, mongo, redis.")
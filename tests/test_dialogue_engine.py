@@ -0,0 +1,149 @@
+import datetime
+import json
+from typing import Any, Dict, List
+
+import pytest
+from haystack import Document
+from haystack.dataclasses import ChatMessage
+
+from dialogue_engine import DialogueEngine, parse_contact, parse_date, parse_ticket_counts, parse_visitor_type
+from shared_state import InMemoryStateBackend
+
+TODAY = datetime.date.today()
+
+
+class FakeRAGService:
+    def __init__(self, reply: str = "", documents: List[Document] = ()):
+        self.shared_state = InMemoryStateBackend()
+        self.reply = reply
+        self.documents = list(documents)
+        self.questions = []
+
+    def query(self, question: str, message_list: List[Dict[str, Any]]) -> List[ChatMessage]:
+        self.questions.append(question)
+        message_list = [ChatMessage.from_dict(message) for message in message_list]
+        message_list.append(ChatMessage.from_user(content=question))
+        message_list.append(ChatMessage.from_assistant(content=json.dumps({"response": self.reply, "suggested": []})))
+        return message_list
+
+    def view_documents(self, filters=None) -> List[Document]:
+        return self.documents
+
+
+def make_state(pending: str, **slots) -> Dict[str, Any]:
+    return {"pending": pending, "slots": slots}
+
+
+def last_reply(message_list: List[ChatMessage]) -> Dict[str, Any]:
+    return json.loads(message_list[-1].content)
+
+
+@pytest.mark.parametrize("text, counts", [
+    ("2 adults and 1 child", {"adult": 2, "child": 1}),
+    ("one senior citizen", {"sr_citizen": 1}),
+    ("2 sr citizens", {"sr_citizen": 2}),
+    ("2 students please", {"student": 2}),
+    ("1 foreigner", {"foreigner": 1}),
+    ("3 tickets for adults", None),
+    ("two adults, maybe a child later", None),
+])
+def test_parse_ticket_counts(text, counts):
+    assert parse_ticket_counts(text) == counts
+
+
+@pytest.mark.parametrize("text, visitor_type", [
+    ("Local visitor", "local"),
+    ("Indian", "local"),
+    ("I am a foreign tourist", "foreign"),
+    ("No, I am not Indian", None),
+    ("I'm not local", None),
+    ("Senior citizen", None),
+])
+def test_parse_visitor_type(text, visitor_type):
+    assert parse_visitor_type(text) == visitor_type
+
+
+@pytest.mark.parametrize("text, contact", [
+    ("My name is Asha Rao, phone 98765 43210", {"name": "Asha Rao", "phone_number": "9876543210"}),
+    ("asha rao 9876543210", {"name": "Asha Rao", "phone_number": "9876543210"}),
+    ("Call me later", None),
+])
+def test_parse_contact(text, contact):
+    assert parse_contact(text) == contact
+
+
+@pytest.mark.parametrize("text, date", [
+    ("today", datetime.date(2026, 10, 19)),
+    ("Tomorrow", datetime.date(2026, 10, 20)),
+    ("2026-10-21", datetime.date(2026, 10, 21)),
+    ("21st October 2026", datetime.date(2026, 10, 21)),
+    ("next week", None),
+])
+def test_parse_date(text, date):
+    assert parse_date(text, today=datetime.date(2026, 10, 19)) == date
+
+
+@pytest.mark.parametrize("days_ahead, accepted", [(0, True), (7, True), (8, False), (-1, False)])
+def test_booking_date_must_be_within_a_week(days_ahead, accepted):
+    engine = DialogueEngine(FakeRAGService())
+    booking_date = (TODAY + datetime.timedelta(days=days_ahead)).isoformat()
+    value = engine.parse_slot("booking_date", booking_date, make_state("booking_date", visitor_type="local"))
+    assert value == ({"booking_date": booking_date} if accepted else None)
+
+
+@pytest.mark.parametrize("date_of_birth, text, accepted", [
+    ("1950-01-01", "1 adult", False),
+    ("1950-01-01", "1 senior citizen", True),
+    ("1990-01-01", "2 adults and 1 child", True),
+    ("2015-01-01", "1 adult", False),
+])
+def test_ticket_categories_are_checked_against_date_of_birth(date_of_birth, text, accepted):
+    engine = DialogueEngine(FakeRAGService())
+    state = make_state("tickets", visitor_type="local", date_of_birth=date_of_birth)
+    assert (engine.parse_slot("tickets", text, state) is not None) == accepted
+
+
+@pytest.mark.parametrize("reply, slot", [
+    (json.dumps({"response": "Which date would you like to visit?"}), "booking_date"),
+    ("Are you a foreign visitor or a local visitor?", "visitor_type"),
+    ("Which date would you like to visit, and would you like any add-ons?", None),
+    ("Please share your name and phone number, and your date of birth.", None),
+])
+def test_detect_pending_slot(reply, slot):
+    assert DialogueEngine.detect_pending_slot(reply) == slot
+
+
+def test_respond_uses_templates_for_structured_answers_and_the_llm_otherwise():
+    event = Document(id="event-1", content="Miniature paintings", meta={
+        "name": "Miniature Paintings Walk", "startDate": f"{TODAY.isoformat()}T11:00:00Z", "ticketPrice": 50,
+        "availableSeats": 10,
+    })
+    rag_service = FakeRAGService(reply="Which date would you like to visit?", documents=[event])
+    engine = DialogueEngine(rag_service)
+    state = make_state("visitor_type")
+    message_list = [ChatMessage.from_assistant(content=json.dumps({"response": "Are you local or foreign?"}))]
+
+    message_list, state = engine.respond("Local visitor", [message.to_dict() for message in message_list], state)
+    reply = last_reply(message_list)
+    assert "date of birth" in reply["response"]
+    assert len(reply["suggested"]) == 3
+    assert state["pending"] == "date_of_birth"
+
+    message_list, state = engine.respond("1990-05-17", [message.to_dict() for message in message_list], state)
+    assert "1. Miniature Paintings Walk" in last_reply(message_list)["response"]
+    assert state["pending"] == "event"
+
+    message_list, state = engine.respond("Book event 1", [message.to_dict() for message in message_list], state)
+    assert state["slots"]["booking_date"] == TODAY.isoformat()
+    assert state["pending"] == "tickets"
+    assert rag_service.questions == []
+
+    message_list, state = engine.respond("Can my grandmother come too?",
+                                         [message.to_dict() for message in message_list], state)
+    assert rag_service.questions == ["Can my grandmother come too?"]
+    assert state["pending"] == "booking_date"
+
+    metrics = engine.metrics()
+    assert metrics["local_turns"] == 3
+    assert metrics["llm_turns"] == 1
+    assert metrics["local_share"] == 0.75
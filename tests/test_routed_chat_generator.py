@@ -0,0 +1,155 @@
+import json
+import time
+from typing import List
+
+import pytest
+from haystack import component
+from haystack.components.validators import JsonSchemaValidator
+from haystack.dataclasses import ChatMessage
+
+from generators.routed_chat_generator import RoutedChatGenerator, classify_turn
+from shared_state import InMemoryStateBackend
+
+SCHEMA = {"type": "object", "properties": {"response": {"type": "string"}}, "required": ["response"]}
+
+
+@component
+class FakeGenerator:
+    def __init__(self, reply: str, latency: float = 0.0):
+        self.reply = reply
+        self.latency = latency
+        self.calls = 0
+
+    @component.output_types(replies=List[ChatMessage])
+    def run(self, messages: List[ChatMessage]):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"replies": [ChatMessage.from_assistant(content=self.reply)]}
+
+
+def valid(text: str) -> str:
+    return json.dumps({"response": text})
+
+
+def make_router(fast_reply: str = valid("fast"), fast_latency: float = 0.0, standard_latency: float = 0.0,
+                shared_state=None):
+    routes = {
+        "fast": {"generator": FakeGenerator(fast_reply, fast_latency), "latency_budget": 0.05,
+                 "cost_per_million_tokens": (1.0, 2.0)},
+        "standard": {"generator": FakeGenerator(valid("standard"), standard_latency), "latency_budget": 0.05},
+        "strong": {"generator": FakeGenerator(valid("strong")), "latency_budget": 1.0},
+    }
+    return RoutedChatGenerator(routes=routes, shared_state=shared_state)
+
+
+def conversation(*turns: str) -> List[ChatMessage]:
+    messages = [ChatMessage.from_system(content="You are a museum ticketing bot.")]
+    for i, turn in enumerate(turns):
+        if i % 2:
+            messages.append(ChatMessage.from_assistant(content=valid(turn)))
+        else:
+            messages.append(ChatMessage.from_user(content=turn))
+    return messages
+
+
+@pytest.mark.parametrize("turns, route", [
+    (("Hello",), "fast"),
+    (("hi", "Are you a local or a foreign visitor?", "Yes, proceed"), "fast"),
+    (("hi", "Are you a local or a foreign visitor?", "Local visitor"), "standard"),
+    (("hi", "Which event?", "Indus Valley Treasures"), "standard"),
+    (("hi", "Which event?", "General admission only"), "standard"),
+    (("hi", "Are you ready to pay?", "Yes"), "strong"),
+    (("Please show me the booking summary",), "strong"),
+])
+def test_classify_turn(turns, route):
+    assert classify_turn(conversation(*turns)) == route
+
+
+def test_opening_system_turn_uses_standard_route():
+    assert classify_turn([ChatMessage.from_system(content="Steps: ...")]) == "standard"
+
+
+def test_retries_on_strong_route_after_validation_error():
+    router = make_router(fast_reply="not json")
+    validator = JsonSchemaValidator(json_schema=SCHEMA)
+
+    replies = router.run(messages=conversation("hello"))["replies"]
+    result = validator.run(messages=replies)
+    assert "validation_error" in result
+
+    replies = router.run(messages=result["validation_error"])["replies"]
+    assert json.loads(replies[0].content) == {"response": "strong"}
+    assert "validated" in validator.run(messages=replies)
+
+    metrics = router.metrics()
+    assert metrics["fast"]["schema_failures"] == 1
+    assert metrics["fast"]["schema_failure_rate"] == 1.0
+    assert metrics["strong"]["calls"] == 1
+    assert metrics["strong"]["schema_failures"] == 0
+
+
+def test_metrics_count_calls_and_cost_per_route():
+    router = make_router()
+    router.run(messages=conversation("hello"))
+    router.run(messages=conversation("ok"))
+    router.run(messages=conversation("I would like two adult tickets for Saturday"))
+
+    metrics = router.metrics()
+    assert metrics["fast"]["calls"] == 2
+    assert metrics["standard"]["calls"] == 1
+    assert metrics["strong"]["calls"] == 0
+    assert metrics["fast"]["cost_usd"] > 0
+    assert metrics["standard"]["cost_usd"] == 0
+    assert metrics["fast"]["budget_misses"] == 0
+
+
+def test_latency_budget_falls_back_to_default_route():
+    router = make_router(fast_latency=0.3)
+    replies = router.run(messages=conversation("hello"))["replies"]
+
+    assert json.loads(replies[0].content) == {"response": "standard"}
+    metrics = router.metrics()
+    assert metrics["fast"]["timeouts"] == 1
+    assert metrics["fast"]["budget_misses"] == 1
+    assert metrics["standard"]["calls"] == 1
+    assert metrics["strong"]["calls"] == 0
+
+
+def test_timed_out_call_is_still_charged_for_its_input():
+    router = make_router(fast_latency=0.3)
+    router.run(messages=conversation("hello"))
+
+    assert router.metrics()["fast"]["cost_usd"] > 0
+
+
+def test_default_route_budget_is_tracked_not_enforced():
+    router = make_router(standard_latency=0.1)
+    replies = router.run(messages=conversation("I would like two adult tickets for Saturday"))["replies"]
+
+    assert json.loads(replies[0].content) == {"response": "standard"}
+    metrics = router.metrics()
+    assert metrics["standard"]["budget_misses"] == 1
+    assert metrics["standard"]["timeouts"] == 0
+    assert metrics["strong"]["calls"] == 0
+
+
+def test_metrics_are_shared_between_workers():
+    shared_state = InMemoryStateBackend()
+    first, second = make_router(shared_state=shared_state), make_router(shared_state=shared_state)
+    first.run(messages=conversation("hello"))
+    second.run(messages=conversation("thanks"))
+
+    assert first.metrics()["fast"]["calls"] == 2
+    assert second.metrics() == first.metrics()
+
+
+def test_serialization_round_trip():
+    router = make_router()
+    restored = RoutedChatGenerator.from_dict(router.to_dict())
+
+    assert restored.default_route == "standard"
+    assert restored.fallback_route == "strong"
+    assert restored.classifier is classify_turn
+    assert restored.routes["fast"]["latency_budget"] == 0.05
+    assert restored.routes["fast"]["generator"].reply == valid("fast")
+    assert json.loads(restored.run(messages=conversation("hello"))["replies"][0].content) == {"response": "fast"}